@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import re
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from kog2p import g2p
+
+
+class ClassEndTest(unittest.TestCase):
+
+    def test_class_end(self):
+        cases = [
+            ('[abc]', 4),
+            ('[]a]x', 3),
+            ('[^]a]x', 4),
+            (r'[\\]abc', 3),
+            (r'[\]]ab', 3),
+            (r'[a\]b]c', 5),
+        ]
+        for pattern, end in cases:
+            self.assertEqual(g2p._classEnd(pattern, 0), end, pattern)
+            re.compile(pattern)
+
+    def test_escaped_backslash_class_rule(self):
+        rule = g2p._compileRule(r'[\\]abc', 'x')
+        self.assertEqual(g2p.phone2prono('\\abc', (rule,)), 'x')
+        rule = g2p._compileRule(r'[\]]ab', 'x')
+        self.assertEqual(g2p.phone2prono(']ab', (rule,)), 'x')
+
+
+class RuleTriggerTest(unittest.TestCase):
+
+    WORDS = ['안녕', '박물관', '스물 여덟째 사람', '읽다', '값이', '밟고', '넓다', '없어요',
+             '같이', '굳이', '신라', '국물', '닭고기', '좋아요', '않는', '싫어', '맑게', '여덟',
+             '한국어 발음 생성기', '서울 시청', '꽃잎', '앉아', '젊은이', '흙', '삶', '몫이',
+             '옷 입다', '  안 녕  ', 'abc 안녕 123']
+
+    def _inputs(self):
+        words = list(self.WORDS)
+        # Deterministic spread of syllable pairs and triples
+        for step in range(0, 11172, 19):
+            words.append(chr(0xAC00 + step) + chr(0xAC00 + (step * 7) % 11172))
+            words.append(chr(0xAC00 + (step * 13) % 11172) + ' ' +
+                         chr(0xAC00 + (step * 31) % 11172) + chr(0xAC00 + (step * 3) % 11172))
+        return words
+
+    def test_trigger_present_wherever_rule_matches(self):
+        # Every string a rule is applied to during conversion must contain
+        # the rule's trigger whenever the rule's pattern matches it
+        checked = 0
+        for word in self._inputs():
+            phones = g2p.addPhoneBoundary(g2p.graph2phone(word))
+            for _ in range(3):
+                for pattern, replacement, trigger, _backref in g2p._COMPILED_RULES:
+                    if isinstance(pattern, str):
+                        matched = pattern in phones
+                        phones = phones.replace(pattern, replacement)
+                    else:
+                        matched = pattern.search(phones) is not None
+                        if matched:
+                            self.assertIn(trigger, phones, (pattern.pattern, phones))
+                        phones = pattern.sub(replacement, phones)
+                    checked += matched
+                phones = g2p._closeBoundary(phones.replace('#', '-'))
+        self.assertGreater(checked, 1000)
+
+    def test_trigger_examples(self):
+        self.assertEqual(g2p._ruleTrigger('(?<=s0,uu,ll,-)(c|p|t)0,'), 's0,uu,ll,-')
+        self.assertEqual(g2p._ruleTrigger('ab{2,30}'), 'a')
+        self.assertEqual(g2p._ruleTrigger(r'\d,-x'), ',-x')
+        self.assertEqual(g2p._ruleTrigger('[a-c]x,'), 'x,')
+        self.assertEqual(g2p._ruleTrigger('ab|cd'), '')
+
+    def test_unsupported_syntax_is_rejected(self):
+        for pattern in ['(?P<x>ab)cd', '(?i:ab)cd', '(?i)ab', '(?#c)ab', 'a{b']:
+            with self.assertRaises(ValueError):
+                g2p._compileRule(pattern, 'x')
+
+
+class KoG2PTest(unittest.TestCase):
+
+    def test_examples(self):
+        self.assertEqual(g2p.runKoG2P('박물관'), 'p0 aa ng mm uu ll k0 wa nf')
+        self.assertEqual(g2p.runKoG2P('안녕'), 'aa nf nn yv ng')
+
+    def test_batch(self):
+        graphs = ['박물관', '안녕', '스물 여덟째 사람']
+        expected = [g2p.runKoG2P(graph) for graph in graphs]
+        self.assertEqual(g2p.runKoG2P_batch(graphs), expected)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(g2p.runKoG2P_batch(graphs, executor=executor), expected)
+        self.assertEqual(g2p.runKoG2P_batch(graphs * 2, workers=2, chunksize=2), expected * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()